@@ -1,12 +1,33 @@
 # This script scrapes a user's download history from Nexus Mods.
-# It automates a Firefox browser in headless mode to log in via cookies,
-# navigate through the download history pages, and recursively scrape details
-# for each mod and its required mods. The final data is saved as a JSON file.
+# It logs in via cookies and pages through the download history using the JSON
+# endpoint behind the history table. The details for each mod and its required
+# mods are then fetched concurrently over plain HTTP and parsed with lxml.
+# A headless Firefox browser is only used as a fallback: for the download history
+# when the JSON endpoint returns nothing, and, through a pool of browser processes,
+# for pages whose content needs JavaScript.
+# Mods are scraped from a worklist, which grows as requirements are discovered;
+# each mod page is scraped once, however many mods require it. Every scraped
+# page is appended to an NDJSON journal next to the output, so an interrupted
+# run resumes where it stopped. The final data, with requirements nested under
+# the files that need them, is saved as a JSON file.
 
+import asyncio
+import atexit
+import functools
 import json
-import time
+import multiprocessing
+import os
+import random
+import re
 import sys # For command line arguments and stderr
+import time
+from collections import defaultdict, deque
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
 from pathlib import Path
+from urllib.parse import unquote
+import httpx
+import lxml.html
+from lxml import etree
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
@@ -14,9 +35,84 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.firefox.options import Options
 
-def configure_driver():
+# Upper bound on in-flight HTTP requests to Nexus Mods at any one time.
+MAX_CONCURRENT_REQUESTS = 8
+# How many mod pages are scraped at once. Progress is also reported every this many mods.
+MODS_IN_FLIGHT = 16
+REQUEST_TIMEOUT = 15
+MAX_KEEPALIVE_CONNECTIONS = 32
+# Transient failures (timeouts, 5xx, Cloudflare hiccups) are retried with exponential backoff.
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 4
+# Sent by both the HTTP client and the browser, so Cloudflare sees one consistent client.
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:128.0) Gecko/20100101 Firefox/128.0'
+
+# The DataTables endpoint that serves the rows of the download history table.
+DOWNLOAD_HISTORY_URL = 'https://www.nexusmods.com/Core/Libs/Common/Managers/Mods?GetDownloadHistory'
+DOWNLOAD_HISTORY_PAGE_LENGTH = 100
+
+# Fallback browsers are separate processes, since WebDriver sessions don't work well across threads.
+# Each Firefox instance needs roughly this much memory, which caps how many we start.
+MAX_BROWSER_WORKERS = 4
+FIREFOX_MEMORY_MB = 300
+# Each browser keeps a persistent profile (HTTP cache and cookie jar) in its own slot here,
+# since Firefox locks a profile while it is open.
+PROFILE_ROOT = Path.home() / '.cache' / 'nexus_scraper_profile'
+
+_fetch_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+# XPath expressions for the fetched pages, compiled once and reused for every mod.
+FILE_HEADERS = etree.XPath('//dt[contains(@id, "file-expander-header")]')
+EXPANDER_ICON = etree.XPath('./div/i')
+FILE_LINK_HREF = etree.XPath('./following-sibling::dd[1]//a[contains(@class, "btn inline-flex")]/@href')
+REQUIRED_MODS = etree.XPath('//div[@class="mod-requirements-tab-content"]/ul/li/a')
+REQUIRED_NAME = etree.XPath('string(./span)')
+POPUP_DOWNLOAD_HREF = etree.XPath('//div[@class="mod-requirements-tab-content"]/a[@class="btn"]/@href')
+CONTENT_DISPOSITION_FILENAME = re.compile(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)', re.IGNORECASE)
+TRACKING_TITLE = etree.XPath("//div[@class='tracking-title']/a")
+
+# The avatar in the site header's account menu, only present once logged in. Scoped to the header,
+# since mod pages also show uploader and comment avatars when logged out.
+LOGGED_IN_AVATAR = (By.XPATH, '//header[@id="head"]//*[contains(@class, "user-profile-menu")]//img[contains(@class, "avatar")]')
+# The cookie that carries the login; the cookies may hold others that the site rotates on its own.
+SESSION_COOKIE = 'nexusmods_session'
+
+# Sets every [name, value] pair passed as the first argument as a cookie for the whole site.
+SET_COOKIES_SCRIPT = """
+for (const [name, value] of arguments[0]) {
+    document.cookie = name + '=' + value + '; domain=.nexusmods.com; path=/; secure';
+}
+"""
+
+# Browser-side equivalent of FILE_HEADERS, EXPANDER_ICON and FILE_LINK_HREF, returning
+# [{name, href}] for every main file on a rendered files tab.
+FILE_LINKS_SCRIPT = """
+return Array.from(document.querySelectorAll('dt[id*="file-expander-header"]'))
+    .filter(dt => dt.querySelector(':scope > div > i'))
+    .map(dt => {
+        let dd = dt.nextElementSibling;
+        while (dd && dd.tagName !== 'DD') dd = dd.nextElementSibling;
+        const a = dd && dd.querySelector('a[class*="btn inline-flex"]');
+        return {name: dt.getAttribute('data-name'), href: a ? a.href : null};
+    })
+    .filter(f => f.href);
+"""
+
+# The logged-in browser owned by a worker process, set up by worker_init.
+_worker_driver = None
+_worker_wait = None
+
+def configure_driver(profile_slot=0):
     """
     Configures and initializes a headless Firefox WebDriver instance.
+
+    The browser runs on a persistent profile, so its HTTP cache and login cookies
+    survive between runs.
+
+    Args:
+        profile_slot (int): Which profile under PROFILE_ROOT to use. Browsers running
+                            at the same time need different slots.
     
     Returns:
         webdriver.Firefox: The configured Selenium WebDriver instance.
@@ -31,155 +127,760 @@ def configure_driver():
     options.set_preference('permissions.default.stylesheet', 2)
     options.set_preference('permissions.default.image', 2)
     options.set_preference('dom.ipc.plugins.enabled.libflashplayer.so', 'false')
+    options.set_preference('general.useragent.override', USER_AGENT)
+    options.set_preference('browser.cache.disk.enable', True)
+    options.set_preference('browser.cache.disk.capacity', 512000) # In KB
+    profile = PROFILE_ROOT / str(profile_slot)
+    profile.mkdir(parents=True, exist_ok=True)
+    options.add_argument('-profile')
+    options.add_argument(str(profile))
+    options.set_preference('media.autoplay.default', 5) # Block all autoplaying media
+    # Keep the site's ad and analytics scripts from loading. JavaScript itself stays enabled,
+    # since pages only reach the browser when their content is not in the raw HTML.
+    options.set_preference('browser.contentblocking.category', 'strict')
+    options.set_preference('privacy.trackingprotection.enabled', True)
+    options.set_preference('privacy.trackingprotection.socialtracking.enabled', True)
+    options.set_preference('privacy.trackingprotection.cryptomining.enabled', True)
+    options.set_preference('privacy.trackingprotection.fingerprinting.enabled', True)
     options.set_capability('pageLoadStrategy', 'eager')
     return webdriver.Firefox(options=options)
 
-def scrape_files(driver, wait, mod_url):
+def load_cookies(cookie_path):
     """
-    Scrapes a single mod page for its files and their requirements.
+    Loads the login cookies exported from a logged-in Nexus Mods session.
 
-    This function navigates to the 'files' tab of a mod page, extracts download links for each main file,
-    and recursively scrapes the requirements for each of those files. It includes robust error handling
-    for network issues and missing elements.
+    Args:
+        cookie_path (str): The file path to the cookies.json file.
+
+    Returns:
+        dict: A mapping of cookie names to values. Malformed entries are skipped.
+    """
+    cookies = {}
+    for i in json.loads(Path(cookie_path).read_text()):
+        if 'name' in i and 'value' in i:
+            cookies[i['name']] = i['value']
+        else:
+            sys.stderr.write(f"Warning: Malformed cookie entry: {i}\n")
+    return cookies
+
+def retry_delay(attempt):
+    """Returns the backoff before retry number `attempt`, with a little jitter."""
+    return min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY) + random.random() * 0.1
+
+def is_transient(error):
+    """Tells whether an HTTP error is worth retrying: network errors, rate limiting and server errors."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+def is_challenge(error):
+    """
+    Tells whether an HTTP error looks like a Cloudflare challenge, which only a real browser can pass.
+
+    Cloudflare answers with 403, or with 503 which is only seen here once its retries have run out.
+    """
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code in (403, 503)
+
+def retrying(fn):
+    """
+    Decorates an async HTTP operation to retry transient failures with exponential backoff.
+
+    The last error is raised once RETRY_ATTEMPTS attempts have failed.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args):
+        for attempt in range(1, RETRY_ATTEMPTS + 1):
+            try:
+                return await fn(*args)
+            except httpx.HTTPError as e:
+                if attempt == RETRY_ATTEMPTS or not is_transient(e):
+                    raise
+                delay = retry_delay(attempt)
+                sys.stderr.write(f"Warning: {fn.__name__} {args[-1]} failed on attempt {attempt}/{RETRY_ATTEMPTS}: {e}. Retrying in {delay:.1f}s\n")
+                await asyncio.sleep(delay)
+    return wrapper
+
+def with_retry(fn, what):
+    """
+    Calls a browser operation, retrying WebDriver failures and timeouts with exponential backoff.
+
+    Args:
+        fn (callable): The operation, taking no arguments.
+        what (str): A description of the operation for the log.
+
+    Returns:
+        The return value of `fn`. The last error is raised once RETRY_ATTEMPTS attempts have failed.
+    """
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            return fn()
+        except WebDriverException as e: # Also covers TimeoutException
+            if attempt == RETRY_ATTEMPTS:
+                raise
+            delay = retry_delay(attempt)
+            sys.stderr.write(f"Warning: {what} failed on attempt {attempt}/{RETRY_ATTEMPTS}: {e}. Retrying in {delay:.1f}s\n")
+            time.sleep(delay)
+
+def build_client(cookies):
+    """
+    Creates the HTTP client shared by every request of a scrape session.
+
+    All requests to nexusmods.com are multiplexed over pooled HTTP/2 connections,
+    so only the first one pays for the TCP and TLS handshakes.
+
+    Args:
+        cookies (dict): The login cookies.
+
+    Returns:
+        httpx.AsyncClient: The logged-in HTTP client.
+    """
+    return httpx.AsyncClient(http2=True, cookies=cookies, headers={'User-Agent': USER_AGENT},
+                             limits=httpx.Limits(max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS),
+                             timeout=REQUEST_TIMEOUT)
+
+@retrying
+async def fetch(client, url):
+    """
+    Fetches a page over HTTP, bounded by the shared concurrency limit.
+
+    Args:
+        client (httpx.AsyncClient): The logged-in HTTP client.
+        url (str): The URL to fetch.
+
+    Returns:
+        tuple: The final URL after redirects and the parsed lxml document,
+               with all links made absolute.
+    """
+    async with _fetch_slots:
+        resp = await client.get(url, follow_redirects=True)
+    resp.raise_for_status()
+    return str(resp.url), parse_page(resp.text, str(resp.url))
+
+def parse_page(html, url):
+    """Parses a fetched page with lxml, making all of its links absolute against `url`."""
+    tree = lxml.html.fromstring(html)
+    tree.make_links_absolute(url)
+    return tree
+
+def file_links(tree, mod_url):
+    """
+    Extracts the download links of the main files from a parsed 'files' tab.
+
+    Args:
+        tree (lxml.html.HtmlElement): The parsed files tab, with absolute links.
+        mod_url (str): The URL of the mod page, for warnings.
+
+    Returns:
+        dict: A mapping of file names to their download page links, or None if the page
+              contains no file headers at all.
+    """
+    # Find all file headers on the page.
+    file_headers = FILE_HEADERS(tree)
+    if not file_headers:
+        return None
+    filelinks = dict()
+    for e in file_headers:
+        # Check for the expander icon; if it's not there, it's likely not a main file entry.
+        if not EXPANDER_ICON(e):
+            continue
+        name = e.get('data-name')
+        hrefs = FILE_LINK_HREF(e)
+        if hrefs:
+            filelinks[name] = hrefs[0].replace('&nmm=1', '')
+        else:
+            sys.stderr.write(f"Warning: Could not get download link for file '{name}' on mod {mod_url}\n")
+    return filelinks
+
+def browser_file_links(driver, wait, mod_url):
+    """
+    Collects the download links from a mod's 'files' tab using the browser.
+
+    This is the fallback for when the raw HTML of the files tab does not contain the file list,
+    for example when the page is served behind a JavaScript challenge.
+
+    Args:
+        driver (webdriver.Firefox): The Selenium WebDriver instance.
+        wait (WebDriverWait): The Selenium WebDriverWait instance.
+        mod_url (str): The URL of the mod page to scrape.
+
+    Returns:
+        dict: A mapping of file names to their download page links.
+    """
+    def load():
+        driver.get(mod_url + '?tab=files')
+        wait.until(EC.presence_of_element_located((By.XPATH, '//dt[contains(@id, "file-expander-header")]')))
+    with_retry(load, f"Loading {mod_url}")
+
+    # Take the rendered DOM in one round-trip and walk it locally with the same XPaths as the HTTP path.
+    filelinks = file_links(parse_page(driver.page_source, driver.current_url), mod_url)
+    if filelinks:
+        return filelinks
+
+    # Otherwise read every file header and its download link in one script call instead of
+    # several WebDriver round-trips per file. The link is in the DOM even for collapsed entries.
+    files = driver.execute_script(FILE_LINKS_SCRIPT)
+    return {f['name']: f['href'].replace('&nmm=1', '') for f in files}
+
+def browser_filename(driver, wait, link):
+    """
+    Reads the real filename from a download page using the browser.
 
     Args:
         driver (webdriver.Firefox): The Selenium WebDriver instance.
         wait (WebDriverWait): The Selenium WebDriverWait instance.
+        link (str): The URL of the download page.
+
+    Returns:
+        str: The filename shown in the download page header.
+    """
+    def load():
+        driver.get(link)
+        return wait.until(EC.presence_of_element_located((By.XPATH, '//div[@class="header"]')))
+    file_element = with_retry(load, f"Loading {link}")
+    # The header may not be laid out yet, so read its text from the DOM rather than the rendering.
+    for line in file_element.get_attribute('textContent').splitlines():
+        if line.strip():
+            return line.strip()
+    raise ValueError("download page header has no text")
+
+@retrying
+async def fetch_download_page(client, url):
+    """
+    Follows a file's download link, transferring as little of the page as possible.
+
+    Nexus answers the link with the requirements pop-up when the file has requirements,
+    which is only known from the final URL after redirects. The pop-up is read in full.
+    For anything else, the filename is taken from the Content-Disposition header if the
+    link redirects straight to the archive, or else from the last segment of the archive's
+    URL, without reading the body. Otherwise the page is parsed as it streams in and the
+    rest of it is dropped as soon as the header div is complete.
+
+    Args:
+        client (httpx.AsyncClient): The logged-in HTTP client.
+        url (str): The download link.
+
+    Returns:
+        tuple: The final URL after redirects, the filename (None if the page has no header),
+               and the parsed requirements pop-up (None if the link did not lead to one).
+    """
+    async with _fetch_slots:
+        async with client.stream('GET', url, follow_redirects=True) as resp:
+            resp.raise_for_status()
+            page_url = str(resp.url)
+            if 'ModRequirementsPopUp' in page_url:
+                await resp.aread()
+                return page_url, None, parse_page(resp.text, page_url)
+            match = CONTENT_DISPOSITION_FILENAME.search(resp.headers.get('Content-Disposition', ''))
+            if match:
+                return page_url, unquote(match.group(1).strip()), None
+            if not resp.headers.get('Content-Type', '').startswith('text/html'):
+                # Not a download page, so this is the archive itself; leaving the block closes it unread.
+                return page_url, unquote(resp.url.path.rsplit('/', 1)[-1]) or None, None
+            parser = etree.HTMLPullParser(events=('end',), tag='div')
+            async for chunk in resp.aiter_bytes():
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    if element.get('class') == 'header':
+                        return page_url, first_line(element), None
+    return page_url, None, None
+
+async def download_page(client, pool, url):
+    """
+    Follows a file's download link like fetch_download_page, reading the filename with the
+    browser instead when the link is behind a challenge.
+
+    The browser only reads the download page header, so a link that leads to the
+    requirements pop-up fails with a timeout there rather than returning the pop-up.
+    """
+    try:
+        return await fetch_download_page(client, url)
+    except httpx.HTTPStatusError as e:
+        if not is_challenge(e):
+            raise
+    return url, await run_in_browser(pool, filename_worker, url), None
+
+def browser_worker_count():
+    """
+    Decides how many browser worker processes the machine can host.
+
+    Returns:
+        int: The number of workers, bounded by the CPU count and, where the platform
+             reports it, by half of the physical memory at FIREFOX_MEMORY_MB per browser.
+    """
+    workers = min(MAX_BROWSER_WORKERS, os.cpu_count() or 1)
+    try:
+        memory_mb = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 2**20
+        workers = min(workers, memory_mb // 2 // FIREFOX_MEMORY_MB)
+    except (AttributeError, ValueError, OSError):
+        pass # os.sysconf is not available on Windows
+    return max(1, workers)
+
+def worker_init(cookie_path, profile_slots):
+    """
+    Starts and logs in the Firefox instance owned by a browser worker process.
+
+    Args:
+        cookie_path (str): The file path to the cookies.json file.
+        profile_slots (multiprocessing.Queue): The free profile slots; each worker takes one.
+    """
+    global _worker_driver, _worker_wait
+    _worker_driver = configure_driver(profile_slots.get())
+    atexit.register(_worker_driver.quit) # Close the browser when the pool shuts the worker down
+    _worker_wait = WebDriverWait(_worker_driver, 5)
+    log_in(_worker_driver, _worker_wait, load_cookies(cookie_path))
+
+def scrape_files_worker(mod_url):
+    """Collects a mod's download links with this worker's browser. See browser_file_links."""
+    return browser_file_links(_worker_driver, _worker_wait, mod_url)
+
+def filename_worker(link):
+    """Reads a download page's filename with this worker's browser. See browser_filename."""
+    return browser_filename(_worker_driver, _worker_wait, link)
+
+async def run_in_browser(pool, func, *args):
+    """Runs a blocking browser fallback on the worker process pool."""
+    return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+def first_line(element):
+    """Returns the first non-empty line of an element's text, mirroring what the browser displays."""
+    for line in ''.join(element.itertext()).splitlines():
+        if line.strip():
+            return line.strip()
+    raise ValueError("element has no text")
+
+async def scrape_files(client, pool, mod_url):
+    """
+    Scrapes a single mod page for its files and their requirements.
+
+    This function fetches the 'files' tab of a mod page, extracts download links for each main file,
+    and collects the requirements and real filename of each of those files. The file list is read
+    from the raw HTML, since the download links are present in it even for collapsed entries; the
+    browser is only used when a page does not contain the expected content without JavaScript.
+    Requirements are not scraped here; scrape_all follows them.
+
+    Args:
+        client (httpx.AsyncClient): The logged-in HTTP client.
+        pool (ProcessPoolExecutor): The browser worker pool used as a fallback.
         mod_url (str): The URL of the mod page to scrape.
 
     Returns:
-        dict: A dictionary containing the mod's URL and a nested dictionary of its files.
+        dict: A dictionary containing the mod's URL and a nested dictionary of its files, whose
+              requirements map mod names to mod page URLs. None if the files tab could not be loaded.
     """
     result = {
         'url': mod_url,
         'files': {}
     }
     try:
-        driver.get(mod_url + '?tab=files')
-        wait.until(EC.visibility_of_element_located((By.XPATH, '//dt[contains(@id, "file-expander-header")]')))
-    except (TimeoutException, WebDriverException) as e:
-        sys.stderr.write(f"Error navigating to mod files page {mod_url}: {e}\n")
-        return result # Return empty result for this mod
-
-    filelinks = dict()
-    # Find all file headers on the page.
-    file_headers = driver.find_elements(by='xpath', value='//dt[contains(@id, "file-expander-header")]')
-    for i, e in enumerate(file_headers):
-        try:
-            # Check for the expander icon; if it's not there, it's likely not a main file entry.
-            e.find_element(by='xpath', value='./div/i')
-        except NoSuchElementException:
-            continue
-        
-        name = e.get_attribute('data-name')
-        link = None # Initialize link to avoid UnboundLocalError
+        _, tree = await fetch(client, mod_url + '?tab=files')
+        filelinks = file_links(tree, mod_url)
+    except httpx.HTTPError as e:
+        if not is_challenge(e):
+            sys.stderr.write(f"Error navigating to mod files page {mod_url}: {e}\n")
+            return None
+        filelinks = None
+    if filelinks is None:
+        # The file list is missing from the raw HTML, or the page is behind a challenge,
+        # so let the browser render the page.
         try:
-            # Try to find the link directly if the file details are already expanded.
-            # The XPath uses `following-sibling` for a more robust selection.
-            link_element = e.find_element('xpath', './following-sibling::dd[1]//a[contains(@class, "btn inline-flex")]')
-            link = link_element.get_attribute('href').replace('&nmm=1', '')
-        except NoSuchElementException:
-            # If not found, click the file header to expand it.
-            try:
-                e.click()
-                # Wait for the details section to become visible after clicking.
-                wait.until(EC.visibility_of_element_located((By.XPATH, f'./following-sibling::dd[1][contains(@class, "open")]')))
-                link_element = e.find_element('xpath', './following-sibling::dd[1]//a[contains(@class, "btn inline-flex")]')
-                link = link_element.get_attribute('href').replace('&nmm=1', '')
-            except (NoSuchElementException, TimeoutException) as inner_e:
-                sys.stderr.write(f"Warning: Could not get download link for file '{name}' on mod {mod_url}: {inner_e}\n")
-                # Continue to the next file header if this one fails.
-                continue
-        
-        # If a link was successfully found, add it to our dictionary.
-        if link:
-            filelinks[name] = link
+            filelinks = await run_in_browser(pool, scrape_files_worker, mod_url)
+        except (TimeoutException, WebDriverException, BrokenExecutor) as e:
+            sys.stderr.write(f"Error navigating to mod files page {mod_url}: {e}\n")
+            return None
     
-    # For each file found, visit its download page to get requirements and the real filename.
+    # Several files can share one download page (variants of the same archive), so group the
+    # names by link and visit each page once.
+    aliases = {}
     for name, link in filelinks.items():
+        aliases.setdefault(link, []).append(name)
+
+    # For each download page found, visit it to get requirements and the real filename.
+    for link, names in aliases.items():
+        name = "', '".join(names) # For messages
         requirements = None
         try:
-            driver.get(link)
+            page_url, file, popup = await download_page(client, pool, link)
             # Check if the download is blocked by a requirements pop-up.
-            if 'ModRequirementsPopUp' in link: # This check is based on the URL, which might not always be reliable
-                try:
-                    # Wait for the requirements pop-up to be visible.
-                    wait.until(EC.visibility_of_element_located((By.ID, 'ModRequirementsPopUp')))
-                    required_elements = driver.find_elements(by='xpath', value='//div[@class="mod-requirements-tab-content"]/ul/li/a')
-                    required = {e.find_element(by='xpath', value='./span').text: e.get_attribute('href') for e in required_elements}
-                    
-                    # Find the button that leads to the actual download page.
-                    modlink_element = driver.find_element('xpath', '//div[@class="mod-requirements-tab-content"]/a[@class="btn"]')
-                    modlink = modlink_element.get_attribute('href')
-
-                    if required:
-                        # Recursively scrape the requirements.
-                        requirements = {k: scrape_files(driver, wait, v) for k, v in required.items() if v.startswith('https://www.nexusmods.com/')}
-                        if not requirements:
-                            requirements = None # Set to None if no valid requirements were found after recursion
-                    
-                    # Navigate to the actual download page after handling requirements.
-                    driver.get(modlink)
-                except (NoSuchElementException, TimeoutException) as req_e:
-                    sys.stderr.write(f"Warning: Could not process requirements popup for {name} on {mod_url}: {req_e}\n")
+            if popup is not None:
+                required = {REQUIRED_NAME(e).strip(): e.get('href') for e in REQUIRED_MODS(popup)}
+
+                # Find the button that leads to the actual download page.
+                modlinks = POPUP_DOWNLOAD_HREF(popup)
+                if not modlinks:
+                    sys.stderr.write(f"Warning: Could not process requirements popup for {name} on {mod_url}\n")
+                    # page_url is still the pop-up, so the browser fallback would not find a filename on it either.
+                    file = 'Error: Could not retrieve filename'
+                else:
+                    requirements = {k: v for k, v in required.items() if v and v.startswith('https://www.nexusmods.com/')}
+                    if not requirements:
+                        requirements = None # Set to None if no valid requirements were found
+
+                    # Continue to the actual download page after handling requirements.
+                    page_url, file, _ = await download_page(client, pool, modlinks[0])
             
-            # Get the filename from the download page header.
-            file_element = wait.until(EC.visibility_of_element_located((By.XPATH, '//div[@class="header"]')))
-            file = file_element.text.splitlines()[0].strip()
-            result['files'][name] = {'requirements': requirements, 'filename': file}
+            # Fall back to the browser if the download page header was not in the raw HTML.
+            if file is None:
+                file = await run_in_browser(pool, filename_worker, page_url)
+            meta = {'requirements': requirements, 'filename': file}
 
-        except (TimeoutException, NoSuchElementException, WebDriverException) as e:
+        except (httpx.HTTPError, ValueError, TimeoutException, NoSuchElementException, WebDriverException, BrokenExecutor) as e:
             # Handle errors during individual file processing.
             sys.stderr.write(f"Error processing file '{name}' from mod {mod_url}: {e}\n")
-            result['files'][name] = {'requirements': requirements, 'filename': 'Error: Could not retrieve filename'}
-            continue # Continue to next file even if one fails
+            meta = {'requirements': requirements, 'filename': 'Error: Could not retrieve filename'}
+            # Continue to next file even if one fails
+
+        for alias in names:
+            result['files'][alias] = dict(meta)
     
     return result
 
-def main(cookie_path, output_path):
+def required_urls(result):
+    """Yields the mod page URLs required by any file of a scrape_files result."""
+    for file in result['files'].values():
+        if file['requirements']:
+            yield from file['requirements'].values()
+
+def stitch(mod_url, results, stitched, chain=frozenset()):
     """
-    The main function to orchestrate the scraping process.
+    Builds the nested output for a mod, replacing each requirement URL with that mod's own output.
 
     Args:
-        cookie_path (str): The file path to the cookies.json file.
-        output_path (str): The file path where the final JSON output will be saved.
+        mod_url (str): The URL of the mod.
+        results (dict): The scrape_files results by mod URL.
+        stitched (dict): Mods already built, by URL. A mod required by many others is built once
+                         and the same dict is shared by every mod that requires it.
+        chain (frozenset): The mod URLs on the requirement chain that led to this mod.
+
+    Returns:
+        tuple: The mod's URL and files, with requirements nested, and whether the output contains
+               a cycle marker. If the mod is already on the requirement chain, the requirements
+               form a cycle and only {'url': mod_url, 'cycle': True} is returned for it.
+    """
+    if mod_url in stitched:
+        return stitched[mod_url], False
+    if mod_url in chain:
+        return {'url': mod_url, 'cycle': True}, True
+    chain = chain | {mod_url}
+    files = {}
+    cyclic = False
+    for name, file in results.get(mod_url, {'files': {}})['files'].items():
+        requirements = file['requirements']
+        if requirements:
+            nested = {}
+            for k, v in requirements.items():
+                nested[k], closes = stitch(v, results, stitched, chain)
+                cyclic = cyclic or closes
+            requirements = nested
+        files[name] = {'requirements': requirements, 'filename': file['filename']}
+    output = {'url': mod_url, 'files': files}
+    # Where a cycle is cut depends on the chain the mod was reached by, so an output
+    # with a cycle marker is built again under every chain instead of being shared.
+    if not cyclic:
+        stitched[mod_url] = output
+    return output, cyclic
+
+def build_modfiles(mods, results):
     """
+    Assembles the final output from the scraped pages.
+
+    Args:
+        mods (dict): A mapping of mod names to mod page URLs from the download history.
+        results (dict): The scrape_files results by mod URL. Mods without a result are left out.
+
+    Returns:
+        dict: The scraped mods, grouped by game, with requirements nested.
+    """
+    modfiles = {}
+    stitched = {}
+    for name, url in mods.items():
+        if url in results:
+            modfiles.setdefault(url.split('/')[3], {})[name], _ = stitch(url, results, stitched)
+    return modfiles
+
+def journal_path_for(output_path):
+    """Returns the path of the NDJSON journal kept next to the JSON output while scraping."""
+    return Path(output_path).with_suffix('.ndjson')
+
+def read_journal(journal_path):
+    """
+    Reads the records written to a journal by earlier, interrupted runs.
+
+    Args:
+        journal_path (Path): The path of the NDJSON journal.
+
+    Yields:
+        dict: Either a {"mods"} record with the download history of a run, or a {"url", "data"}
+              record per scraped mod page. A truncated last line, left by a crash mid-write, is skipped.
+    """
+    if not journal_path.exists():
+        return
+    with journal_path.open(encoding='utf8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def fold_journal(journal_path):
+    """
+    Folds a journal back into the nested {game: {name: data}} layout of the JSON output.
+
+    Args:
+        journal_path (Path): The path of the NDJSON journal.
+
+    Returns:
+        dict: The scraped mods, grouped by game.
+    """
+    mods = {}
+    results = {}
+    for record in read_journal(journal_path):
+        if 'mods' in record:
+            mods.update(record['mods'])
+        elif 'url' in record:
+            results[record['url']] = record['data']
+    return build_modfiles(mods, results)
+
+async def scrape_all(client, mods, pool, journal_path):
+    """
+    Scrapes every mod in the download history and every mod they require, appending each page to the journal.
+
+    The mods are scraped from a worklist: it is seeded with the download history, and the
+    requirements of each scraped page are added as it finishes. Up to MODS_IN_FLIGHT pages are
+    scraped concurrently and each page is scraped once. Pages already in the journal are skipped.
+
+    Args:
+        client (httpx.AsyncClient): The logged-in HTTP client.
+        mods (dict): A mapping of mod names to mod page URLs.
+        pool (ProcessPoolExecutor): The browser worker pool used as a fallback.
+        journal_path (Path): The path of the NDJSON journal.
+
+    Returns:
+        dict: The scrape_files results by mod URL. A page that could not be loaded has no files.
+    """
+    results = {record['url']: record['data'] for record in read_journal(journal_path) if 'url' in record}
+    # Group the mods by game and dispatch them game by game, so consecutive requests hit the same pages.
+    grouped = defaultdict(dict)
+    for name, url in mods.items():
+        try:
+            grouped[url.split('/')[3]][name] = url
+        except IndexError:
+            sys.stderr.write(f"Warning: Could not extract game from URL: {url}\n")
+
+    queue = deque()
+    visited = set(results) # Every URL that is scraped or already queued
+    def enqueue(urls):
+        for url in urls:
+            if url not in visited:
+                visited.add(url)
+                queue.append(url)
+    enqueue(url for game, items in sorted(grouped.items()) for name, url in sorted(items.items()))
+    for result in list(results.values()):
+        enqueue(required_urls(result)) # Requirements of resumed pages may not have been reached yet
+    if results:
+        sys.stderr.write(f"Resuming: {len(results)} mods already scraped, {len(queue)} queued.\n")
+
+    # A line cut short by a crash is ignored by read_journal, but the next record must start on its own line.
+    truncated = False
+    if journal_path.exists() and journal_path.stat().st_size:
+        with journal_path.open('rb') as f:
+            f.seek(-1, os.SEEK_END)
+            truncated = f.read() != b'\n'
+
+    with journal_path.open('a', encoding='utf8', buffering=1) as journal:
+        if truncated:
+            journal.write('\n')
+        def record(entry):
+            journal.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+        record({'mods': mods})
+
+        in_flight = {}
+        scraped = 0
+        while queue or in_flight:
+            while queue and len(in_flight) < MODS_IN_FLIGHT:
+                url = queue.popleft()
+                in_flight[asyncio.ensure_future(scrape_files(client, pool, url))] = url
+            finished, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                url = in_flight.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    sys.stderr.write(f"Error processing mod {url}: {e}\n")
+                    result = None
+                if result is None:
+                    # Not journaled, so a resumed run tries this page again.
+                    results[url] = {'url': url, 'files': {}}
+                    continue
+                results[url] = result
+                record({'url': url, 'data': result})
+                enqueue(required_urls(result))
+                scraped += 1
+                if scraped % MODS_IN_FLIGHT == 0:
+                    sys.stderr.write(f"Progress: {len(results)} mods scraped, {len(in_flight)} in progress, {len(queue)} queued.\n")
+    return results
+
+def write_output(modfiles, output_path):
+    """Saves the scraped mods as the final JSON file. Returns True on success."""
+    try:
+        Path(output_path).write_text(json.dumps(modfiles, ensure_ascii=False, indent=4), encoding='utf8')
+        return True
+    except Exception as e:
+        sys.stderr.write(f"Error writing output JSON to {output_path}: {e}\n")
+        return False
+
+def history_row_mods(row):
+    """
+    Extracts the mod links from one row of the download history JSON.
+
+    Args:
+        row (list or dict): The cells of a table row, as rendered HTML fragments.
+
+    Returns:
+        dict: A mapping of mod names to mod page URLs found in the row.
+    """
+    mods = {}
+    cells = row.values() if isinstance(row, dict) else row
+    for cell in cells:
+        if not isinstance(cell, str) or '<' not in cell:
+            continue
+        fragment = lxml.html.fragment_fromstring(cell, create_parent='div')
+        fragment.make_links_absolute('https://www.nexusmods.com/')
+        for mod in TRACKING_TITLE(fragment):
+            name = mod.text_content().strip()
+            url = mod.get('href')
+            if name and url:
+                mods[name] = url
+    return mods
+
+@retrying
+async def fetch_history_page(client, start):
+    """Fetches one page of download history rows, beginning at row `start`, from the JSON endpoint."""
+    # Merge the paging parameters into the endpoint's own query rather than replacing it.
+    url = httpx.URL(DOWNLOAD_HISTORY_URL).copy_merge_params({'start': start, 'length': DOWNLOAD_HISTORY_PAGE_LENGTH})
+    resp = await client.get(url, headers={'X-Requested-With': 'XMLHttpRequest'})
+    resp.raise_for_status()
+    return resp.json()
+
+async def fetch_download_history(client):
+    """
+    Collects every mod in the download history from the table's JSON endpoint.
+
+    Args:
+        client (httpx.AsyncClient): The logged-in HTTP client.
+
+    Returns:
+        dict: A mapping of mod names to mod page URLs. Empty if the endpoint could not be used.
+    """
+    mods = {}
+    start = 0
+    try:
+        while True:
+            page = await fetch_history_page(client, start)
+            rows = page['data']
+            found = len(mods)
+            for row in rows:
+                mods.update(history_row_mods(row))
+            start += len(rows)
+            # Stop if the endpoint ignores paging and repeats itself.
+            if not rows or len(mods) == found:
+                break
+            # The endpoint may serve fewer rows than asked for, so a short page only marks
+            # the end when it does not say how many rows there are.
+            if 'recordsTotal' in page:
+                if start >= int(page['recordsTotal']):
+                    break
+            elif len(rows) < DOWNLOAD_HISTORY_PAGE_LENGTH:
+                break
+    except (httpx.HTTPError, ValueError, KeyError, TypeError) as e:
+        sys.stderr.write(f"Error reading download history from {DOWNLOAD_HISTORY_URL}: {e}\n")
+    return mods
+
+def wait_for_login(driver, wait):
+    """
+    Waits until the page shows the account avatar, i.e. the login cookies have taken effect.
+
+    Args:
+        driver (webdriver.Firefox): The Selenium WebDriver instance.
+        wait (WebDriverWait): The Selenium WebDriverWait instance.
+    """
+    try:
+        wait.until(EC.presence_of_element_located(LOGGED_IN_AVATAR))
+    except TimeoutException:
+        sys.stderr.write("Warning: Could not confirm login; the cookies may have expired.\n")
+
+def log_in(driver, wait, cookies):
+    """
+    Logs the browser in with the cookies, unless its persistent profile is still logged in with the same session.
+
+    Args:
+        driver (webdriver.Firefox): The Selenium WebDriver instance.
+        wait (WebDriverWait): The Selenium WebDriverWait instance.
+        cookies (dict): The login cookies.
+    """
+    driver.get('https://www.nexusmods.com/')
+    jar = {c['name']: c['value'] for c in driver.get_cookies()}
+    # A profile logged in with an older session than cookies.json would scrape as the wrong account, or expire mid-run.
+    if SESSION_COOKIE in cookies and jar.get(SESSION_COOKIE) == cookies[SESSION_COOKIE] and driver.find_elements(*LOGGED_IN_AVATAR):
+        sys.stderr.write("Browser profile is already logged in with the session from the cookies, skipping the login.\n")
+        return
+    # Drop the profile's old session first. document.cookie cannot overwrite its HttpOnly cookies, and
+    # add_cookie would set a host-only cookie next to the old .nexusmods.com one, so both would be sent.
+    driver.delete_all_cookies()
+    # Set all the cookies in one script call rather than one WebDriver round-trip per cookie.
+    driver.execute_script(SET_COOKIES_SCRIPT, list(cookies.items()))
+    # Set any the script could not one by one.
+    jar = {c['name']: c['value'] for c in driver.get_cookies()}
+    for name, value in cookies.items():
+        if jar.get(name) != value:
+            driver.add_cookie({'name': name, 'value': value})
+    driver.get('https://www.nexusmods.com/') # Refresh after adding cookies
+    wait_for_login(driver, wait)
+
+def _table_ready(driver):
+    """Wait condition for the download history table: the page is loaded and DataTables is not processing."""
+    return driver.execute_script(
+        "return document.readyState === 'complete' && !document.querySelector('.dataTables_processing[style*=\"block\"]')")
+
+def browser_download_history(cookies):
+    """
+    Collects every mod in the download history by paging through the table in the browser.
+
+    This is the fallback for when the JSON endpoint returns nothing.
+
+    Args:
+        cookies (dict): The login cookies.
+
+    Returns:
+        dict: A mapping of mod names to mod page URLs.
+    """
+    mods = {}
     Firefox = None
     try:
-        Firefox = configure_driver()
+        Firefox = configure_driver() # Profile slot 0 is free, the worker pool has not started yet
         wait = WebDriverWait(Firefox, 5) # Increased wait time slightly for more reliability
 
-        # Login using cookies
-        Firefox.get('https://www.nexusmods.com/')
-        try:
-            cookies_data = json.loads(Path(cookie_path).read_text())
-            for i in cookies_data:
-                if 'name' in i and 'value' in i:
-                    Firefox.add_cookie({'name': i['name'], 'value': i['value']})
-                else:
-                    sys.stderr.write(f"Warning: Malformed cookie entry: {i}\n")
-            Firefox.get('https://www.nexusmods.com/') # Refresh after adding cookies
-            time.sleep(2) # Give a moment for cookies to apply and for the page to reflect the logged-in state.
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            sys.stderr.write(f"Error loading cookies from {cookie_path}: {e}. Please ensure the file exists and is valid JSON.\n")
-            return # Exit if cookies cannot be loaded
+        log_in(Firefox, wait, cookies)
 
         # Navigate to download history
         try:
-            Firefox.get('https://www.nexusmods.com/users/myaccount?tab=download+history')
-            wait.until(EC.visibility_of_element_located((By.XPATH, "//div[@class='tracking-title']/a")))
+            def load():
+                Firefox.get('https://www.nexusmods.com/users/myaccount?tab=download+history')
+                wait.until(EC.presence_of_element_located((By.XPATH, "//div[@class='tracking-title']/a")))
+            with_retry(load, "Loading the download history")
         except (TimeoutException, WebDriverException) as e:
             sys.stderr.write(f"Error navigating to download history: {e}\n")
-            return
+            return mods
 
         # Scrape all mod links from the download history, paginating through all pages.
-        mods = {}
         while True:
             try:
                 # Wait for the list of mods on the current page to be present.
                 wait.until(EC.presence_of_all_elements_located((By.XPATH, "//div[@class='tracking-title']/a")))
                 for mod in Firefox.find_elements(by='xpath', value="//div[@class='tracking-title']/a"):
-                    name = mod.text.strip()
+                    # Presence does not imply visibility, and .text is empty for elements that are not rendered yet.
+                    name = mod.get_attribute('textContent').strip()
                     url = mod.get_attribute('href')
                     if name and url:
                         mods[name] = url
@@ -190,42 +891,81 @@ def main(cookie_path, output_path):
                     break # Exit loop if on the last page
                 else:
                     next_button.click()
-                    # This is a crucial wait. It waits for the old button to become stale (i.e., detached from the DOM),
-                    # which confirms that the page has started to update/navigate.
-                    wait.until(EC.staleness_of(next_button)) # Wait for the old button to disappear/become stale
-                    wait.until(EC.visibility_of_element_located((By.XPATH, "//div[@class='tracking-title']/a"))) # Wait for new content to load
+                    # Wait until DataTables has finished drawing the next page, rather than for the old button to go stale.
+                    wait.until(_table_ready)
+                    wait.until(EC.presence_of_element_located((By.XPATH, "//div[@class='tracking-title']/a"))) # Wait for new content to load
             except (NoSuchElementException, TimeoutException, WebDriverException) as e:
                 sys.stderr.write(f"Error during pagination of download history: {e}\n")
                 break # Break loop on pagination error
+    except WebDriverException as e:
+        sys.stderr.write(f"Error starting the browser for the download history: {e}\n")
+    finally:
+        # Ensure the browser is always closed, even if errors occur.
+        if Firefox:
+            Firefox.quit() # Ensure browser is closed
+    return mods
 
-        modfiles = {}
-        for name, url in mods.items():
-            try:
-                game = url.split('/')[3]
-                if game not in modfiles:
-                    modfiles[game] = {}
-                modfiles[game][name] = scrape_files(Firefox, wait, url)
-            except IndexError:
-                sys.stderr.write(f"Warning: Could not extract game from URL: {url}\n")
-            except Exception as e:
-                sys.stderr.write(f"Error processing mod {name} ({url}): {e}\n")
-
-        # Save all collected data to a JSON file.
+async def scrape_session(cookies, cookie_path, journal_path):
+    """
+    Lists the download history and scrapes every mod in it over one shared HTTP client.
+
+    Args:
+        cookies (dict): The login cookies.
+        cookie_path (str): The file path to the cookies.json file, for the browser workers.
+        journal_path (Path): The path of the NDJSON journal.
+
+    Returns:
+        tuple: The download history as a mapping of mod names to URLs, and the scrape_files
+               results by mod URL.
+    """
+    async with build_client(cookies) as client:
+        mods = await fetch_download_history(client)
+        if not mods:
+            sys.stderr.write("Download history endpoint returned no mods, falling back to the browser.\n")
+            mods = await asyncio.to_thread(browser_download_history, cookies)
+
+        # The browser workers are only started if a page actually needs the fallback.
+        # "spawn" gives each worker a clean process on every platform, which Firefox needs on Windows.
+        workers = browser_worker_count()
+        context = multiprocessing.get_context('spawn')
+        profile_slots = context.Queue()
+        for slot in range(workers):
+            profile_slots.put(slot)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=worker_init, initargs=(cookie_path, profile_slots)) as pool:
+            return mods, await scrape_all(client, mods, pool, journal_path)
+
+def main(cookie_path, output_path):
+    """
+    The main function to orchestrate the scraping process.
+
+    Args:
+        cookie_path (str): The file path to the cookies.json file.
+        output_path (str): The file path where the final JSON output will be saved.
+    """
+    try:
         try:
-            Path(output_path).write_text(json.dumps(modfiles, ensure_ascii=False, indent=4), encoding='utf8')
-        except Exception as e:
-            sys.stderr.write(f"Error writing output JSON to {output_path}: {e}\n")
+            cookies = load_cookies(cookie_path)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            sys.stderr.write(f"Error loading cookies from {cookie_path}: {e}. Please ensure the file exists and is valid JSON.\n")
+            return # Exit if cookies cannot be loaded
+
+        journal = journal_path_for(output_path)
+        mods, results = asyncio.run(scrape_session(cookies, cookie_path, journal))
+
+        # Save all collected data to a JSON file. The journal is only needed until then.
+        if write_output(build_modfiles(mods, results), output_path):
+            journal.unlink()
 
     except Exception as e:
         sys.stderr.write(f"An unhandled error occurred in the main scraper process: {e}\n")
-    finally:
-        # Ensure the browser is always closed, even if errors occur.
-        if Firefox:
-            Firefox.quit() # Ensure browser is closed
 
 if __name__ == "__main__":
     # This block allows the script to be run from the command line.
     # It handles command-line arguments for cookie and output file paths.
+    # "--fold <journal> <output>" instead converts a journal left by an interrupted run.
+    if len(sys.argv) == 4 and sys.argv[1] == '--fold':
+        sys.exit(0 if write_output(fold_journal(Path(sys.argv[2])), sys.argv[3]) else 1)
     
     # Default paths, can be overridden by command line arguments
     default_cookie_path = 'D:/cookies.json'